@@ -1,25 +1,53 @@
-from fastapi import FastAPI, APIRouter, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, APIRouter, Request, Response, WebSocket, WebSocketDisconnect
 from fastapi.responses import JSONResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import MongoClient, WriteConcern
 import os
 import logging
-import json
+import time
+import orjson
 from pathlib import Path
-from pydantic import BaseModel, Field
-from typing import List, Dict, Optional
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Callable, List, Dict, Optional, Set, Tuple, Union
 import uuid
 from datetime import datetime, timezone
 import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from itertools import chain
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
+# Configure logging
+logging.basicConfig(
+    level=os.environ.get('LOG_LEVEL', 'WARNING').upper(),
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# MongoDB connection, opened in startup so that importing the module
+# (e.g. the uvicorn supervisor when WORKERS > 1) creates no clients or threads
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+client: Optional[AsyncIOMotorClient] = None
+db = None
+
+# Synchronous client for the write-only history collections, used from a worker thread
+sync_client: Optional[MongoClient] = None
+sync_db = None
+history_executor: Optional[ThreadPoolExecutor] = None
+
+def dumps(obj) -> bytes:
+    """Serialize to JSON bytes; datetimes are written as UTC ISO 8601."""
+    return orjson.dumps(obj, default=str, option=orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z)
+
+def json_response(content) -> Response:
+    """Return JSON without FastAPI's response validation and jsonable_encoder pass"""
+    if not isinstance(content, bytes):
+        content = dumps(content)
+    return Response(content=content, media_type="application/json")
 
 # Create the main app without a prefix
 app = FastAPI()
@@ -27,81 +55,410 @@ app = FastAPI()
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
 
+# Send failures that mean the client is gone: Starlette raises RuntimeError once
+# the socket is closed, the server raises OSError subclasses for dropped transports
+DISCONNECT_ERRORS = (WebSocketDisconnect, RuntimeError, OSError)
+
 # WebSocket Manager for real-time communication with sections
 class ConnectionManager:
     def __init__(self):
-        self.participant_connections: Dict[str, List[WebSocket]] = {
-            'all': [],
-            'left': [],
-            'center': [],
-            'right': []
+        # Each participant lives in exactly one bucket; 'all' holds those without a section
+        self.participant_connections: Dict[str, Set[WebSocket]] = {
+            'all': set(),
+            'left': set(),
+            'center': set(),
+            'right': set()
         }
+        # Reverse map so a participant can be removed without scanning every section
+        self._ws_section: Dict[WebSocket, str] = {}
         self.admin_connections: List[WebSocket] = []
+        # Connections are per process; with several workers broadcasts go through the bridge
+        self.bridge: Optional["RedisBridge"] = None
+        # Participant changes are coalesced into one admin update per interval
+        self.admin_update_interval = 0.1
+        self._admin_dirty = False
+        self._admin_task: Optional[asyncio.Task] = None
         
     async def connect_participant(self, websocket: WebSocket, section: str = 'all'):
         await websocket.accept()
+        self._add_participant(websocket, section)
+        
+    def _add_participant(self, websocket: WebSocket, section: str):
         if section not in self.participant_connections:
             section = 'all'
-        self.participant_connections[section].append(websocket)
-        self.participant_connections['all'].append(websocket)
+        self.participant_connections[section].add(websocket)
+        self._ws_section[websocket] = section
+        self._mark_admin_dirty()
+        
+    def change_section(self, websocket: WebSocket, section: str):
+        """Move an already accepted participant to another section"""
+        self.disconnect_participant(websocket)
+        self._add_participant(websocket, section)
         
     async def connect_admin(self, websocket: WebSocket):
         await websocket.accept()
         self.admin_connections.append(websocket)
         
     def disconnect_participant(self, websocket: WebSocket):
-        for section_list in self.participant_connections.values():
-            if websocket in section_list:
-                section_list.remove(websocket)
+        section = self._ws_section.pop(websocket, None)
+        if section is not None:
+            self.participant_connections[section].discard(websocket)
+            self._mark_admin_dirty()
             
     def disconnect_admin(self, websocket: WebSocket):
         if websocket in self.admin_connections:
             self.admin_connections.remove(websocket)
             
+    def _mark_admin_dirty(self):
+        # New admins get fresh stats on connect, so nothing to remember otherwise
+        if not self.has_admins:
+            return
+        self._admin_dirty = True
+        if self._admin_task is None:
+            # spawn() logs a failed update instead of leaving it unretrieved
+            self._admin_task = spawn(self._flush_admin_after(self.admin_update_interval))
+            
+    async def _flush_admin_after(self, delay: float):
+        """Send one participant_update for all changes since it was scheduled"""
+        try:
+            await asyncio.sleep(delay)
+            self._admin_dirty = False
+            if self.bridge is not None:
+                # Every worker's admins get the summed counts once the report arrives
+                await self.bridge.publish_stats()
+            else:
+                await self.send_to_admins(lambda: {
+                    "type": "participant_update",
+                    "section_stats": self.get_section_stats()
+                })
+        except asyncio.CancelledError:
+            self._admin_task = None
+            raise
+        except Exception:
+            # Keep the update pending so the next interval retries it
+            self._admin_dirty = True
+            raise
+        finally:
+            if self._admin_task is not None:
+                self._admin_task = None
+                # Changes that arrived while sending, or a failed send, get their own update
+                if self._admin_dirty:
+                    self._mark_admin_dirty()
+            
+    async def _fan_out(self, connections, payload: bytes, on_disconnect):
+        """Send an already-encoded payload to every connection concurrently.
+
+        Connections that turn out to be closed are passed to on_disconnect;
+        any other error, including cancellation, is re-raised afterwards.
+        """
+        connections = list(connections)
+        if not connections:
+            return
+        results = await asyncio.gather(
+            *(connection.send_bytes(payload) for connection in connections),
+            return_exceptions=True
+        )
+        error = None
+        for connection, result in zip(connections, results):
+            if isinstance(result, DISCONNECT_ERRORS):
+                on_disconnect(connection)
+            elif isinstance(result, BaseException) and error is None:
+                error = result
+        if error is not None:
+            raise error
+            
     async def send_to_participants(self, message: dict, section: str = 'all'):
         """Send message to participants in specific section"""
-        target_connections = self.participant_connections.get(section, [])
-        if target_connections:
-            disconnected = []
-            for connection in target_connections:
-                try:
-                    await connection.send_text(json.dumps(message))
-                except:
-                    disconnected.append(connection)
+        # Encode once for the whole broadcast
+        await self.broadcast_raw(dumps(message), section)
+        
+    async def broadcast_raw(self, payload: bytes, section: str = 'all'):
+        """Send an already-encoded message to participants in specific section"""
+        # Sections come straight from clients; anything unknown addresses everyone
+        if section not in self.participant_connections:
+            section = 'all'
+        if self.bridge is not None:
+            await self.bridge.publish(RedisBridge.PARTICIPANTS + section, payload)
+        else:
+            await self.deliver_to_participants(payload, section)
             
-            # Remove disconnected connections
-            for conn in disconnected:
-                self.disconnect_participant(conn)
+    async def deliver_to_participants(self, payload: bytes, section: str = 'all'):
+        """Send an already-encoded message to this process's participants"""
+        if section == 'all':
+            target_connections = chain.from_iterable(self.participant_connections.values())
+        else:
+            target_connections = self.participant_connections.get(section, ())
+        await self._fan_out(target_connections, payload, self.disconnect_participant)
                 
-    async def send_to_admins(self, message: dict):
-        """Send message to all connected admins"""
-        if self.admin_connections:
-            disconnected = []
-            for connection in self.admin_connections:
-                try:
-                    await connection.send_text(json.dumps(message))
-                except:
-                    disconnected.append(connection)
+    @property
+    def has_admins(self) -> bool:
+        # Other workers' admins are invisible here, so assume an audience when bridged
+        return self.bridge is not None or bool(self.admin_connections)
+        
+    async def send_to_admins(self, message: Union[dict, Callable[[], dict]]):
+        """Send message to all connected admins
+
+        message may be a zero-argument callable; it is only built when there
+        is an admin to receive it.
+        """
+        if not self.has_admins:
+            return
+        if callable(message):
+            message = message()
+        payload = dumps(message)
+        if self.bridge is not None:
+            await self.bridge.publish(RedisBridge.ADMINS, payload)
+        else:
+            await self.deliver_to_admins(payload)
             
-            # Remove disconnected connections
-            for conn in disconnected:
-                self.admin_connections.remove(conn)
+    async def deliver_to_admins(self, payload: bytes):
+        """Send an already-encoded message to this process's admins"""
+        if self.admin_connections:
+            await self._fan_out(self.admin_connections, payload, self.disconnect_admin)
                 
     def get_participant_count(self, section: str = 'all'):
-        return len(self.participant_connections.get(section, []))
+        if section == 'all':
+            return len(self._ws_section)
+        return len(self.participant_connections.get(section, ()))
     
     def get_section_stats(self):
+        if self.bridge is not None:
+            return self.bridge.cluster_stats()
+        return self.local_section_stats()
+        
+    def local_section_stats(self):
         return {
-            'total': len(set(self.participant_connections['all'])),
+            'total': len(self._ws_section),
             'left': len(self.participant_connections['left']),
             'center': len(self.participant_connections['center']), 
             'right': len(self.participant_connections['right'])
         }
 
+# Relays broadcasts between uvicorn worker processes
+class RedisBridge:
+    CHANNEL_PREFIX = "festival:"
+    # Participant sections get their own namespace so they can't hit the control channels
+    PARTICIPANTS = "participants:"
+    ADMINS = "admins"
+    EVENTS = "events"
+    STATS = "stats"
+    RECONNECT_DELAY = 1.0
+    # Workers re-report their counts this often; silent for three intervals means gone
+    STATS_INTERVAL = 5.0
+    
+    def __init__(self, redis_url: str, manager: ConnectionManager):
+        # Only needed when running several workers
+        import redis.asyncio as redis
+        
+        self.redis = redis.from_url(redis_url)
+        self.manager = manager
+        # Last participant counts reported by each worker, with the monotonic time received
+        self.worker_stats: Dict[str, Tuple[float, dict]] = {}
+        self._tasks: List[asyncio.Task] = []
+        
+    async def publish(self, target: str, payload: bytes):
+        await self.redis.publish(self.CHANNEL_PREFIX + target, payload)
+        
+    async def publish_stats(self):
+        """Report this worker's participant counts to every worker"""
+        await self.publish(self.STATS, dumps({
+            "worker": BOOT_ID,
+            "section_stats": self.manager.local_section_stats()
+        }))
+        
+    def cluster_stats(self) -> dict:
+        """This worker's live counts plus the latest counts of every other live worker"""
+        totals = self.manager.local_section_stats()
+        cutoff = time.monotonic() - 3 * self.STATS_INTERVAL
+        for worker, (received, stats) in self.worker_stats.items():
+            if worker != BOOT_ID and received >= cutoff:
+                for key, count in stats.items():
+                    totals[key] = totals.get(key, 0) + count
+        return totals
+        
+    def start(self):
+        self._tasks = [
+            asyncio.create_task(self._listen()),
+            asyncio.create_task(self._report_stats()),
+        ]
+        
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        try:
+            # A None report removes this worker from everyone's totals
+            await self.publish(self.STATS, dumps({"worker": BOOT_ID, "section_stats": None}))
+        except Exception:
+            logger.exception("Failed to withdraw participant counts from the bridge")
+        await self.redis.aclose()
+        
+    async def _report_stats(self):
+        # Lets workers that start later learn the counts, and ages out workers that died
+        while True:
+            try:
+                await self.publish_stats()
+            except Exception:
+                logger.exception("Failed to report participant counts")
+            cutoff = time.monotonic() - 3 * self.STATS_INTERVAL
+            self.worker_stats = {
+                worker: entry for worker, entry in self.worker_stats.items() if entry[0] >= cutoff
+            }
+            await asyncio.sleep(self.STATS_INTERVAL)
+            
+    async def _update_stats(self, payload: bytes):
+        report = orjson.loads(payload)
+        worker, stats = report["worker"], report["section_stats"]
+        previous = self.worker_stats.pop(worker, (0.0, None))[1]
+        if stats is not None:
+            self.worker_stats[worker] = (time.monotonic(), stats)
+        # Periodic reports usually repeat the last counts; only changes reach the admins
+        if stats != previous and self.manager.admin_connections:
+            await self.manager.deliver_to_admins(dumps({
+                "type": "participant_update",
+                "section_stats": self.cluster_stats()
+            }))
+        
+    async def _listen(self):
+        """Deliver every published broadcast to this worker's own connections"""
+        # A dead listener would leave this worker publishing but never delivering,
+        # so resubscribe after any failure instead of letting the task end
+        while True:
+            try:
+                pubsub = self.redis.pubsub()
+                try:
+                    await pubsub.psubscribe(self.CHANNEL_PREFIX + "*")
+                    async for message in pubsub.listen():
+                        if message["type"] == "pmessage":
+                            await self._deliver(message["channel"].decode(), message["data"])
+                finally:
+                    await pubsub.aclose()
+            except Exception:
+                logger.exception("Redis bridge subscription failed, reconnecting")
+                await asyncio.sleep(self.RECONNECT_DELAY)
+                
+    async def _deliver(self, channel: str, payload: bytes):
+        target = channel[len(self.CHANNEL_PREFIX):]
+        try:
+            if target.startswith(self.PARTICIPANTS):
+                await self.manager.deliver_to_participants(payload, target[len(self.PARTICIPANTS):])
+            elif target == self.ADMINS:
+                await self.manager.deliver_to_admins(payload)
+            elif target == self.EVENTS:
+                await refresh_beat_sync_state()
+            elif target == self.STATS:
+                await self._update_stats(payload)
+        except Exception:
+            logger.exception("Failed to deliver bridged message on %s", channel)
+
+# The bridge is only enabled through this variable: running `uvicorn --workers N`
+# without WORKERS=N leaves every broadcast on the worker that handled it
+WORKERS = int(os.environ.get('WORKERS', 1))
+# Identifies this process among the workers and across restarts
+BOOT_ID = uuid.uuid4().hex[:12]
+
 manager = ConnectionManager()
 
+# Buffered writer for append-only history collections
+class HistoryWriter:
+    def __init__(self, collection_name: str, max_batch: int = 500, interval: float = 0.1):
+        self.collection_name = collection_name
+        self.collection = None
+        self.max_batch = max_batch
+        self.interval = interval
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self._batch: List[dict] = []
+        self._full = asyncio.Event()
+        self._stopping = False
+        self._task: Optional[asyncio.Task] = None
+        
+    def add(self, document: dict):
+        """Queue a document for the next batched insert"""
+        # insert_many sets _id on the documents, so keep the caller's dict clean
+        self.queue.put_nowait(dict(document))
+        if self.queue.qsize() >= self.max_batch:
+            self._full.set()
+            
+    def start(self):
+        # History is fire-and-forget, nothing reads it back on the hot path
+        self.collection = sync_db.get_collection(self.collection_name, write_concern=WriteConcern(w=0))
+        self._task = asyncio.create_task(self._run())
+        
+    async def stop(self):
+        """Stop the flush loop and write whatever is still queued"""
+        # Cancelling could interrupt a flush and drop the batch it already took,
+        # so wake the loop with a None sentinel and let it finish on its own
+        self._stopping = True
+        self.queue.put_nowait(None)
+        self._full.set()
+        if self._task:
+            await self._task
+            self._task = None
+        await self.flush()
+        
+    async def _run(self):
+        while not self._stopping:
+            document = await self.queue.get()
+            if document is not None:
+                self._batch.append(document)
+            # Give the batch up to one interval to fill, unless it fills sooner
+            if not self._stopping:
+                try:
+                    await asyncio.wait_for(self._full.wait(), self.interval)
+                except asyncio.TimeoutError:
+                    pass
+            await self.flush()
+            
+    async def flush(self):
+        self._full.clear()
+        batch, self._batch = self._batch, []
+        while not self.queue.empty():
+            document = self.queue.get_nowait()
+            if document is not None:
+                batch.append(document)
+        loop = asyncio.get_running_loop()
+        for start in range(0, len(batch), self.max_batch):
+            insert = partial(
+                self.collection.insert_many, batch[start:start + self.max_batch], ordered=False
+            )
+            try:
+                await loop.run_in_executor(history_executor, insert)
+            except Exception:
+                logger.exception("Failed to write %s history batch", self.collection_name)
+
+# Keep references to fire-and-forget tasks until they finish
+background_tasks: Set[asyncio.Task] = set()
+
+def _task_done(task: asyncio.Task):
+    background_tasks.discard(task)
+    # Nobody awaits these tasks, so their errors would otherwise go unreported
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("Background task failed", exc_info=task.exception())
+
+def spawn(coro) -> asyncio.Task:
+    task = asyncio.create_task(coro)
+    background_tasks.add(task)
+    task.add_done_callback(_task_done)
+    return task
+
+# Shared wall-clock timestamp for outgoing messages, refreshed by tick_clock()
+now_iso = datetime.now(timezone.utc).isoformat()
+clock_task: Optional[asyncio.Task] = None
+
+async def tick_clock():
+    global now_iso
+    while True:
+        now_iso = datetime.now(timezone.utc).isoformat()
+        await asyncio.sleep(0.01)
+
+light_command_history = HistoryWriter('light_commands')
+beat_history = HistoryWriter('beat_data')
+
 # Advanced Models
 class LightCommand(BaseModel):
+    model_config = ConfigDict(frozen=True, extra='ignore')
+    
     command_type: str  # "color", "effect", "beat_sync", "wave"
     color: str  # hex color code
     effect: Optional[str] = None  # "rainbow", "pulse", "strobe", "fade", "wave", "beat_sync"
@@ -112,6 +469,9 @@ class LightCommand(BaseModel):
     beat_sensitivity: Optional[float] = 0.5  # 0.0 to 1.0 for beat detection
     wave_direction: Optional[str] = "left_to_right"  # "left_to_right", "center_out", "random"
 
+class LightCommandBatch(BaseModel):
+    commands: List[LightCommand]
+
 class SectionJoin(BaseModel):
     section: str  # "left", "center", "right"
 
@@ -134,8 +494,29 @@ class EventCreate(BaseModel):
     description: str
 
 # Store latest command and beat data for polling fallback
+# (per worker: with WORKERS > 1 polling only sees what its own worker handled)
 latest_command = None
+# Bumped on every command; pollers send it back as If-None-Match
+command_version = 0
+latest_command_payload = b'{"command":null}'
 latest_beat_data = None
+latest_beat_payload = b'{"beat":null}'
+
+# Active event with beat sync enabled, cached so beats need no database lookup
+active_beat_sync: Optional[dict] = None
+
+async def refresh_beat_sync_state():
+    global active_beat_sync
+    active_beat_sync = await db.events.find_one(
+        {"is_active": True, "beat_sync_enabled": True}, {"_id": 0}
+    )
+
+async def event_state_changed():
+    """Refresh the cached event state, in every worker when bridged"""
+    if manager.bridge is not None:
+        await manager.bridge.publish(RedisBridge.EVENTS, b"")
+    else:
+        await refresh_beat_sync_state()
 
 # Basic CRUD endpoints
 @api_router.get("/")
@@ -149,32 +530,32 @@ async def root():
 
 @api_router.post("/events", response_model=Event)
 async def create_event(event_data: EventCreate):
-    event_dict = event_data.dict()
+    event_dict = event_data.model_dump()
     event = Event(**event_dict)
-    await db.events.insert_one(event.dict())
+    await db.events.insert_one(event.model_dump())
     return event
 
-@api_router.get("/events", response_model=List[Event])
+@api_router.get("/events", response_model=None)
 async def get_events():
-    events = await db.events.find().to_list(1000)
-    return [Event(**event) for event in events]
+    # Stored documents already have the Event shape, so skip revalidating them
+    events = await db.events.find({}, {"_id": 0}).sort("created_at", -1).limit(100).to_list(100)
+    return json_response(events)
 
 @api_router.get("/events/active")
 async def get_active_event():
-    active_event = await db.events.find_one({"is_active": True})
-    if active_event:
-        return Event(**active_event)
-    return None
+    active_event = await db.events.find_one({"is_active": True}, {"_id": 0})
+    return json_response(active_event)
 
 @api_router.post("/events/{event_id}/activate")
 async def activate_event(event_id: str):
-    # Deactivate all events first
-    await db.events.update_many({}, {"$set": {"is_active": False}})
+    # Deactivate the currently active events first
+    await db.events.update_many({"is_active": True}, {"$set": {"is_active": False}})
     # Activate selected event
     result = await db.events.update_one(
         {"id": event_id}, 
         {"$set": {"is_active": True}}
     )
+    await event_state_changed()
     if result.modified_count > 0:
         return {"message": "Event activated"}
     return {"error": "Event not found"}
@@ -185,6 +566,7 @@ async def toggle_beat_sync(event_id: str, enabled: bool):
         {"id": event_id}, 
         {"$set": {"beat_sync_enabled": enabled}}
     )
+    await event_state_changed()
     if result.modified_count > 0:
         return {"message": f"Beat sync {'enabled' if enabled else 'disabled'}"}
     return {"error": "Event not found"}
@@ -192,39 +574,55 @@ async def toggle_beat_sync(event_id: str, enabled: bool):
 @api_router.post("/light-command")
 async def send_light_command(command: LightCommand):
     """Admin endpoint to send advanced light commands"""
-    global latest_command
+    return await dispatch_light_command(command)
+
+@api_router.post("/light-command/batch")
+async def send_light_command_batch(batch: LightCommandBatch):
+    """Admin endpoint to send several light commands in one request, in order"""
+    results = [await dispatch_light_command(command) for command in batch.commands]
+    return {"results": results}
+
+async def dispatch_light_command(command: LightCommand, payload: Optional[bytes] = None):
+    """Store, broadcast and report a light command.
+
+    Callers with a pre-encoded participant message (presets) pass it as
+    payload; such messages carry no timestamp.
+    """
+    global latest_command, command_version, latest_command_payload
     
-    command_data = command.dict()
-    command_data["timestamp"] = datetime.now(timezone.utc).isoformat()
+    command_data = command.model_dump()
+    command_data["timestamp"] = now_iso
     
     # Store as latest command for polling fallback
     latest_command = command_data
+    command_version += 1
+    latest_command_payload = dumps({"command": command_data})
     
-    # Store command in database for history
-    await db.light_commands.insert_one(command_data)
+    # Queue command for the batched history write
+    light_command_history.add(command_data)
     
     # Handle different command types
     if command.effect == "wave":
-        await send_wave_effect(command_data)
+        send_wave_effect(command_data)
     else:
         # Send to specific section or all participants
-        await manager.send_to_participants({
-            "type": "light_command",
-            "data": command_data
-        }, command.section)
+        if payload is None:
+            payload = dumps({"type": "light_command", "data": command_data})
+        await manager.broadcast_raw(payload, command.section)
     
     # Notify admins about the command
     stats = manager.get_section_stats()
-    await manager.send_to_admins({
-        "type": "command_sent",
-        "data": command_data,
-        "section_stats": stats
-    })
+    if manager.has_admins:
+        await manager.send_to_admins({
+            "type": "command_sent",
+            "data": command_data,
+            "section_stats": stats
+        })
     
     return {"message": "Command sent", "section_stats": stats}
 
-async def send_wave_effect(command_data):
-    """Send wave effect across sections with timing"""
+def send_wave_effect(command_data):
+    """Schedule wave effect across sections with timing"""
     sections = ['left', 'center', 'right']
     delay = 300  # milliseconds between sections
     
@@ -233,37 +631,36 @@ async def send_wave_effect(command_data):
     elif command_data['wave_direction'] == 'right_to_left':
         sections = ['right', 'center', 'left']
     
+    loop = asyncio.get_running_loop()
     for i, section in enumerate(sections):
         # Add delay information to command
-        wave_command = command_data.copy()
-        wave_command['wave_delay'] = i * delay
-        
-        await manager.send_to_participants({
+        payload = dumps({
             "type": "light_command",
-            "data": wave_command
-        }, section)
+            "data": {**command_data, "wave_delay": i * delay}
+        })
         
-        # Small delay between sections for server-side timing
-        if i < len(sections) - 1:
-            await asyncio.sleep(delay / 1000)
+        # Server-side timing between sections without holding the caller
+        loop.call_later(
+            i * delay / 1000,
+            lambda p=payload, s=section: spawn(manager.broadcast_raw(p, s))
+        )
 
 @api_router.post("/beat-data")
 async def receive_beat_data(beat_data: BeatData):
     """Receive beat data from admin's audio analysis"""
-    global latest_beat_data
+    global latest_beat_data, latest_beat_payload
     
-    beat_dict = beat_data.dict()
-    beat_dict["timestamp"] = datetime.now(timezone.utc).isoformat()
+    beat_dict = beat_data.model_dump()
+    beat_dict["timestamp"] = now_iso
     
-    # Store clean data without MongoDB ObjectId for latest_beat_data
-    latest_beat_data = beat_dict.copy()
+    latest_beat_data = beat_dict
+    latest_beat_payload = dumps({"beat": beat_dict})
     
-    # Store beat data in database
-    await db.beat_data.insert_one(beat_dict)
+    # Queue beat data for the batched history write
+    beat_history.add(beat_dict)
     
     # Send beat sync command to all participants if enabled
-    active_event = await db.events.find_one({"is_active": True, "beat_sync_enabled": True})
-    if active_event:
+    if active_beat_sync:
         beat_command = {
             "command_type": "beat_sync",
             "color": "#FFFFFF",  # White for beat sync
@@ -280,45 +677,46 @@ async def receive_beat_data(beat_data: BeatData):
     
     return {"message": "Beat data received", "bpm": beat_data.bpm}
 
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak If-None-Match comparison: a list of tags, W/ prefixes ignored, * matches"""
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/") == etag:
+            return True
+    return False
+
 @api_router.get("/latest-command")
-async def get_latest_command(timestamp: str = None):
-    """Get the latest light command for polling fallback"""
-    global latest_command
-    
-    if latest_command:
-        if timestamp:
-            try:
-                provided_timestamp = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
-                command_timestamp = datetime.fromisoformat(latest_command['timestamp'].replace('Z', '+00:00'))
-                
-                if command_timestamp > provided_timestamp:
-                    return {"command": latest_command}
-                else:
-                    return {"command": None}
-            except:
-                return {"command": latest_command}
-        else:
-            return {"command": latest_command}
-    
-    return {"command": None}
+async def get_latest_command(request: Request):
+    """Get the latest light command for polling fallback
+
+    Answers 304 while the client's If-None-Match still names the current command.
+    """
+    # The boot id keeps versions from different workers or restarts from matching
+    etag = f'"{BOOT_ID}-{command_version}"'
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    response = json_response(latest_command_payload)
+    response.headers["ETag"] = etag
+    return response
 
 @api_router.get("/latest-beat")
 async def get_latest_beat():
     """Get latest beat data"""
-    global latest_beat_data
-    return {"beat": latest_beat_data}
+    return json_response(latest_beat_payload)
 
 @api_router.get("/stats")
 async def get_stats():
     section_stats = manager.get_section_stats()
     admin_count = len(manager.admin_connections)
     
-    return {
+    return json_response({
         "sections": section_stats,
         "admins": admin_count,
         "total_connections": section_stats['total'] + admin_count,
         "beat_sync_active": latest_beat_data is not None
-    }
+    })
 
 @api_router.post("/join-section")
 async def join_section(section_data: SectionJoin):
@@ -326,92 +724,90 @@ async def join_section(section_data: SectionJoin):
     return {"message": f"Join section {section_data.section} via WebSocket"}
 
 # Preset light patterns
+PRESET_SPECS = {
+    "party_mode": {
+        "command_type": "effect",
+        "color": "#FF00FF",
+        "effect": "strobe",
+        "intensity": 1.0,
+        "speed": 2.5,
+        "duration": 10000,
+        "section": "all"
+    },
+    "calm_wave": {
+        "command_type": "effect", 
+        "color": "#4ECDC4",
+        "effect": "wave",
+        "intensity": 0.7,
+        "speed": 1.0,
+        "duration": 8000,
+        "section": "all",
+        "wave_direction": "left_to_right"
+    },
+    "festival_finale": {
+        "command_type": "effect",
+        "color": "#FFD700",
+        "effect": "rainbow",
+        "intensity": 1.0,
+        "speed": 3.0,
+        "duration": 15000,
+        "section": "all"
+    }
+}
+
+# Presets never change, so validate and encode them once at import
+PRESETS: Dict[str, Tuple[LightCommand, bytes]] = {}
+for _name, _spec in PRESET_SPECS.items():
+    _command = LightCommand(**_spec)
+    PRESETS[_name] = (
+        _command,
+        dumps({"type": "light_command", "data": _command.model_dump()})
+    )
+
 @api_router.post("/preset/{preset_name}")
 async def send_preset(preset_name: str):
     """Send predefined light patterns"""
-    presets = {
-        "party_mode": {
-            "command_type": "effect",
-            "color": "#FF00FF",
-            "effect": "strobe",
-            "intensity": 1.0,
-            "speed": 2.5,
-            "duration": 10000,
-            "section": "all"
-        },
-        "calm_wave": {
-            "command_type": "effect", 
-            "color": "#4ECDC4",
-            "effect": "wave",
-            "intensity": 0.7,
-            "speed": 1.0,
-            "duration": 8000,
-            "section": "all",
-            "wave_direction": "left_to_right"
-        },
-        "festival_finale": {
-            "command_type": "effect",
-            "color": "#FFD700",
-            "effect": "rainbow",
-            "intensity": 1.0,
-            "speed": 3.0,
-            "duration": 15000,
-            "section": "all"
-        }
-    }
-    
-    if preset_name in presets:
-        command = LightCommand(**presets[preset_name])
-        result = await send_light_command(command)
-        return result
+    if preset_name in PRESETS:
+        command, payload = PRESETS[preset_name]
+        return await dispatch_light_command(command, payload)
     else:
         return {"error": "Preset not found"}
 
 # WebSocket endpoints with section support
 @app.websocket("/ws/participant/{section}")
 async def websocket_participant(websocket: WebSocket, section: str = "all"):
+    # Admins are updated by the manager's debounced participant_update
     await manager.connect_participant(websocket, section)
-    print(f"Participant connected to section '{section}'. Stats: {manager.get_section_stats()}")
-    
-    # Update all admins about new participant
-    await manager.send_to_admins({
-        "type": "participant_update",
-        "section_stats": manager.get_section_stats()
-    })
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Participant connected to section %r. Stats: %s", section, manager.get_section_stats())
     
     try:
         while True:
             # Keep connection alive and listen for messages
             data = await websocket.receive_text()
-            message = json.loads(data)
+            message = orjson.loads(data)
             
             # Handle participant messages
             if message.get("type") == "heartbeat":
-                await websocket.send_text(json.dumps({"type": "heartbeat_ack"}))
+                await websocket.send_bytes(dumps({"type": "heartbeat_ack"}))
             elif message.get("type") == "section_change":
                 # Handle section change
                 new_section = message.get("section", "all")
-                manager.disconnect_participant(websocket)
-                await manager.connect_participant(websocket, new_section)
+                manager.change_section(websocket, new_section)
                 
     except WebSocketDisconnect:
         manager.disconnect_participant(websocket)
-        print(f"Participant disconnected. Stats: {manager.get_section_stats()}")
-        
-        # Update all admins about disconnection
-        await manager.send_to_admins({
-            "type": "participant_update",
-            "section_stats": manager.get_section_stats()
-        })
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Participant disconnected. Stats: %s", manager.get_section_stats())
 
 @app.websocket("/ws/admin")
 async def websocket_admin(websocket: WebSocket):
     await manager.connect_admin(websocket)
-    print(f"Admin connected. Total admins: {len(manager.admin_connections)}")
+    logger.debug("Admin connected. Total admins: %d", len(manager.admin_connections))
     
     try:
         # Send initial stats to admin
-        await websocket.send_text(json.dumps({
+        await websocket.send_bytes(dumps({
             "type": "initial_stats",
             "section_stats": manager.get_section_stats(),
             "admin_count": len(manager.admin_connections)
@@ -420,7 +816,7 @@ async def websocket_admin(websocket: WebSocket):
         while True:
             # Listen for admin commands
             data = await websocket.receive_text()
-            message = json.loads(data)
+            message = orjson.loads(data)
             
             if message.get("type") == "light_command":
                 # Forward light command to participants
@@ -428,17 +824,17 @@ async def websocket_admin(websocket: WebSocket):
                 section = command_data.get("section", "all")
                 
                 if command_data.get("effect") == "wave":
-                    await send_wave_effect(command_data)
+                    send_wave_effect(command_data)
                 else:
                     await manager.send_to_participants(message, section)
                 
-                # Store command in database
-                command_data["timestamp"] = datetime.now(timezone.utc).isoformat()
-                await db.light_commands.insert_one(command_data)
+                # Queue command for the batched history write
+                command_data["timestamp"] = now_iso
+                light_command_history.add(command_data)
                 
     except WebSocketDisconnect:
         manager.disconnect_admin(websocket)
-        print(f"Admin disconnected. Total admins: {len(manager.admin_connections)}")
+        logger.debug("Admin disconnected. Total admins: %d", len(manager.admin_connections))
 
 # Include the router in the main app
 app.include_router(api_router)
@@ -449,15 +845,66 @@ app.add_middleware(
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
-logger = logging.getLogger(__name__)
+@app.on_event("startup")
+async def connect_db():
+    global client, db, sync_client, sync_db, history_executor
+    client = AsyncIOMotorClient(mongo_url)
+    db = client[os.environ['DB_NAME']]
+    sync_client = MongoClient(mongo_url)
+    sync_db = sync_client[os.environ['DB_NAME']]
+    history_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="history")
+
+@app.on_event("startup")
+async def create_indexes():
+    await db.events.create_index("id", unique=True)
+    # Only active events are ever looked up by is_active
+    await db.events.create_index("is_active", partialFilterExpression={"is_active": True})
+
+@app.on_event("startup")
+async def load_event_state():
+    await refresh_beat_sync_state()
+
+@app.on_event("startup")
+async def start_clock():
+    global clock_task
+    clock_task = asyncio.create_task(tick_clock())
+
+@app.on_event("startup")
+async def start_history_writers():
+    light_command_history.start()
+    beat_history.start()
+
+@app.on_event("startup")
+async def start_broadcast_bridge():
+    if WORKERS > 1:
+        manager.bridge = RedisBridge(os.environ['REDIS_URL'], manager)
+        manager.bridge.start()
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+    if manager.bridge is not None:
+        await manager.bridge.stop()
+    if clock_task is not None:
+        clock_task.cancel()
+    # Both writers share the history thread; let each drain fully before it goes away
+    await asyncio.gather(light_command_history.stop(), beat_history.stop())
+    history_executor.shutdown(wait=True)
+    sync_client.close()
+    client.close()
+
+if __name__ == "__main__":
+    import uvicorn
+    
+    # A single worker runs this module's app directly instead of importing it again
+    uvicorn.run(
+        "server:app" if WORKERS > 1 else app,
+        host="0.0.0.0",
+        port=int(os.environ.get("PORT", 8000)),
+        loop="uvloop",
+        http="httptools",
+        ws="websockets",
+        workers=WORKERS
+    )
\ No newline at end of file
@@ -5,6 +5,12 @@ const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
 const WS_URL = BACKEND_URL.replace('http', 'ws');
 
+// The server sends JSON as binary frames
+const socketDecoder = new TextDecoder();
+const parseSocketMessage = (event) => JSON.parse(
+  typeof event.data === 'string' ? event.data : socketDecoder.decode(event.data)
+);
+
 // Audio Analysis Hook for Beat Detection
 const useAudioAnalysis = () => {
   const [audioContext, setAudioContext] = useState(null);
@@ -143,6 +149,7 @@ const ParticipantScreen = () => {
     try {
       const wsUrl = `${WS_URL}/ws/participant/${section}`;
       wsRef.current = new WebSocket(wsUrl);
+      wsRef.current.binaryType = 'arraybuffer';
       
       wsRef.current.onopen = () => {
         setIsConnected(true);
@@ -150,7 +157,7 @@ const ParticipantScreen = () => {
       };
       
       wsRef.current.onmessage = (event) => {
-        const message = JSON.parse(event.data);
+        const message = parseSocketMessage(event);
         handleLightCommand(message);
       };
       
@@ -172,10 +179,16 @@ const ParticipantScreen = () => {
   };
 
   const startPollingFallback = () => {
+    let commandEtag = null;
     const pollInterval = setInterval(async () => {
       try {
-        const response = await fetch(`${API}/latest-command?timestamp=${Date.now()}`);
-        if (response.ok) {
+        // The server answers 304 until a newer command than commandEtag exists
+        const response = await fetch(`${API}/latest-command`, {
+          cache: 'no-store',
+          headers: commandEtag ? { 'If-None-Match': commandEtag } : {}
+        });
+        if (response.status === 200) {
+          commandEtag = response.headers.get('ETag');
           const data = await response.json();
           if (data && data.command) {
             handleLightCommand({
@@ -501,6 +514,7 @@ const AdminPanel = () => {
   const connectWebSocket = () => {
     try {
       wsRef.current = new WebSocket(`${WS_URL}/ws/admin`);
+      wsRef.current.binaryType = 'arraybuffer';
       
       wsRef.current.onopen = () => {
         setIsConnected(true);
@@ -508,7 +522,7 @@ const AdminPanel = () => {
       };
       
       wsRef.current.onmessage = (event) => {
-        const message = JSON.parse(event.data);
+        const message = parseSocketMessage(event);
         if (message.type === 'participant_update' || message.type === 'initial_stats') {
           setSectionStats(message.section_stats || message.participant_count);
         }